@@ -0,0 +1,369 @@
+"""
+Matching and command-line helpers shared by safety_filter and safety_layer_text.
+
+Both modules import their optional-dependency flags from here, so they always
+agree on which backend is active.
+
+Optional dependencies:
+    BETTER_PROFANITY_AVAILABLE, AHOCORASICK_AVAILABLE, HYPERSCAN_AVAILABLE,
+    NUMPY_AVAILABLE
+
+Matching:
+    fold                       lowercase text, keeping offsets aligned
+    detect_script              'en', 'hi', 'ta' or 'te' from Unicode script
+    build_trie, compile_alt    prefix-factored alternation from a word table
+    compile_whole_words        whole-word regex around an alternation
+    compile_hyperscan          Hyperscan database of literal words
+    hyperscan_matches          raw Hyperscan matches as character spans
+    select_spans               raw matches -> whole, non-overlapping words
+    splice                     rebuild text with spans replaced
+    mask                       mask string of a given length
+    register_better_profanity  add a wordlist to better-profanity's censor
+
+Command line:
+    CLI_CHUNK_SIZE, detect_file_script, read_chunks
+    open_atomic                write a file via a temporary that replaces it
+"""
+
+import contextlib
+import os
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Set, TextIO, Tuple
+
+try:
+    from better_profanity import profanity
+    BETTER_PROFANITY_AVAILABLE = True
+except ImportError:
+    BETTER_PROFANITY_AVAILABLE = False
+
+try:
+    import ahocorasick  # noqa: F401
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# Shorter texts are cheaper to scan in pure Python than to hand to NumPy
+_NUMPY_MIN_CHARS = 64
+
+# Script detection without NumPy: one C-level search for any Indic character
+# settles the common all-English case, and the per-script searches only need
+# to look past the first hit
+_INDIC_CHARS = re.compile('[\u0900-\u097F\u0B80-\u0C7F]')
+_DEVANAGARI_CHARS = re.compile('[\u0900-\u097F]')
+_TAMIL_CHARS = re.compile('[\u0B80-\u0BFF]')
+
+# better-profanity keeps one global censor list: its defaults are loaded once
+# per process and each wordlist added at most once, so filters do not reset
+# each other's words
+_bp_lock = threading.Lock()
+_bp_wordlists: Set[Tuple[str, ...]] = set()
+
+# Hyperscan scratch space per thread, for the process-wide databases
+_SCRATCH = threading.local()
+
+
+# Combining marks (Indic vowel signs, viramas and nuktas, Latin diacritics)
+# belong to the word they attach to, though regex \w does not count them
+_COMBINING_MARKS = frozenset(
+    ch for ch in map(chr, range(0x0300, 0x0E00))
+    if unicodedata.category(ch) in ('Mn', 'Mc')
+)
+_WORD_CHAR_CLASS = '[\\w' + ''.join(sorted(_COMBINING_MARKS)) + ']'
+
+
+def _is_word_char(ch: str) -> bool:
+    """Word character for whole-word matching: regex \\w or a combining mark"""
+    return ch.isalnum() or ch == '_' or ch in _COMBINING_MARKS
+
+
+def compile_whole_words(alternation: str) -> re.Pattern:
+    """Compile an alternation to match only where _is_word_char sees word boundaries"""
+    return re.compile(
+        '(?<!' + _WORD_CHAR_CLASS + ')(' + alternation + ')(?!' + _WORD_CHAR_CLASS + ')'
+    )
+
+
+# Masks are sliced from here rather than built with '*' * n per hit
+_STARS = '*' * 256
+
+
+def select_spans(text: str, hits: list) -> list:
+    """
+    Reduce raw (start, end, ...) matches to whole words that do not overlap.
+    
+    Hits are sorted in place; at each position the longest whole-word match
+    wins, and anything overlapping an accepted match is dropped.
+    """
+    hits.sort(key=lambda h: (h[0], -h[1]))
+    
+    # Hot loop: keep lookups local
+    n = len(text)
+    is_word_char = _is_word_char
+    spans: list = []
+    append = spans.append
+    pos = 0
+    for hit in hits:
+        start, end = hit[0], hit[1]
+        if start < pos:
+            continue
+        if start and is_word_char(text[start - 1]):
+            continue
+        if end < n and is_word_char(text[end]):
+            continue
+        append(hit)
+        pos = end
+    return spans
+
+
+def build_trie(table: Mapping[str, Any]) -> dict:
+    """
+    Build a character trie of nested dicts from a replacement table.
+    
+    Nodes ending a word carry its table value under the '$' key; only the
+    keys shape the trie, so any value type works.
+    """
+    root: Dict[str, Any] = {}
+    for key, value in table.items():
+        node = root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node['$'] = value
+    return root
+
+
+def compile_alt(trie: dict) -> str:
+    """
+    Render a trie as a prefix-factored regex alternation.
+    
+    e.g. {fuck, fucking, fool} -> f(?:ool|uck(?:ing)?). Shared prefixes are
+    matched once instead of once per word, and the greedy optional
+    suffixes still prefer the longest word.
+    """
+    branches = [
+        re.escape(ch) + compile_alt(child)
+        for ch, child in sorted(trie.items()) if ch != '$'
+    ]
+    if not branches:
+        return ''
+    if len(branches) == 1 and '$' not in trie:
+        return branches[0]
+    alt = '(?:' + '|'.join(branches) + ')'
+    return alt + '?' if '$' in trie else alt
+
+
+def splice(text: str, spans: List[Tuple[int, int, str, str]],
+            replacements: Optional[Dict[str, str]] = None) -> str:
+    """
+    Rebuild text with every span replaced in one left-to-right pass.
+    
+    Each word's replacement (synonym or mask) is looked up rather than
+    rebuilt, so repeated hits share a single string. Without a
+    replacements mapping, each span's own replacement is used.
+    """
+    parts = []
+    pos = 0
+    for start, end, word, rep in spans:
+        parts.append(text[pos:start])
+        parts.append(replacements[word] if replacements is not None else rep)
+        pos = end
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+
+def mask(length: int) -> str:
+    """Mask string of the given length"""
+    return _STARS[:length] if length <= len(_STARS) else '*' * length
+
+
+def register_better_profanity(words: Tuple[str, ...]) -> None:
+    """Add words to better-profanity's censor list, loading its defaults first if needed"""
+    with _bp_lock:
+        if words in _bp_wordlists:
+            return
+        if not _bp_wordlists:
+            profanity.load_censor_words()
+        profanity.add_censor_words(words)
+        _bp_wordlists.add(words)
+
+
+def compile_hyperscan(keys: List[str]):
+    """
+    Compile lowercase literal words into a Hyperscan database; pattern ids index keys.
+    
+    Words are matched byte for byte against folded text, like the other
+    backends. Caseless matching is left off: it would also match bytes of
+    a different length (e.g. 'ſ' for 's'), so a match's start could not be
+    worked out from the word's length.
+    """
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[re.escape(k).encode('utf-8') for k in keys],
+        ids=list(range(len(keys))),
+        elements=len(keys)
+    )
+    return database
+
+
+def hyperscan_matches(database, lengths: List[int], text: str) -> List[Tuple[int, int, int]]:
+    """
+    Scan text with a Hyperscan database built by compile_hyperscan.
+    
+    Args:
+        database: The compiled database
+        lengths: UTF-8 length of each pattern, indexed by pattern id
+        text: Folded text to scan (see fold)
+    
+    Returns:
+        (start, end, pattern id) character spans of every match, possibly
+        overlapping and not checked for word boundaries
+    """
+    scratches = _SCRATCH.__dict__.setdefault('scratches', {})
+    scratch = scratches.get(database)
+    if scratch is None:
+        # Scratch space cannot be shared by concurrent scans
+        scratch = scratches[database] = hyperscan.Scratch(database)
+    # Lone surrogates are passed through rather than rejected
+    data = text.encode('utf-8', 'surrogatepass')
+    matches = []
+    
+    def on_match(idx, _from, to, flags, context):
+        # Start of match is not tracked (costly in Hyperscan); words match
+        # byte for byte, so each starts its own length before the end
+        matches.append((to - lengths[idx], to, idx))
+    
+    database.scan(data, match_event_handler=on_match, scratch=scratch)
+    
+    if len(data) != len(text):
+        # Convert UTF-8 byte offsets to character offsets
+        char_pos = {}
+        prev_byte = prev_char = 0
+        for offset in sorted({o for m in matches for o in m[:2]}):
+            prev_char += len(data[prev_byte:offset].decode('utf-8', 'surrogatepass'))
+            prev_byte = offset
+            char_pos[offset] = prev_char
+        matches = [(char_pos[s], char_pos[e], idx) for s, e, idx in matches]
+    
+    return matches
+
+
+def detect_script(text: str) -> str:
+    """Language code of the highest-priority script present: Devanagari, Tamil, Telugu, else 'en'"""
+    if text.isascii():
+        # O(1): CPython records whether a string is pure ASCII
+        return 'en'
+    if NUMPY_AVAILABLE and len(text) >= _NUMPY_MIN_CHARS:
+        codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        if np.any((codes >= 0x0900) & (codes <= 0x097F)):
+            return 'hi'
+        elif np.any((codes >= 0x0B80) & (codes <= 0x0BFF)):
+            return 'ta'
+        elif np.any((codes >= 0x0C00) & (codes <= 0x0C7F)):
+            return 'te'
+        return 'en'
+    
+    first = _INDIC_CHARS.search(text)
+    if first is None:
+        return 'en'
+    ch = first.group()
+    if ch <= '\u097F':
+        return 'hi'
+    pos = first.end()
+    if _DEVANAGARI_CHARS.search(text, pos):
+        return 'hi'
+    if ch <= '\u0BFF' or _TAMIL_CHARS.search(text, pos):
+        return 'ta'
+    return 'te'
+
+
+def fold(text: str) -> str:
+    """Lowercase text once for matching, keeping offsets aligned with the original"""
+    if text.islower():
+        return text
+    lower = text.lower()
+    if len(lower) != len(text):
+        # A few characters (e.g. 'İ') grow when lowercased; fold them one
+        # at a time so offsets keep lining up with the original text
+        lower = ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+    return lower
+
+
+# Command-line interface reads its input this many characters at a time
+CLI_CHUNK_SIZE = 1 << 20
+
+
+def detect_file_script(f: TextIO) -> str:
+    """
+    detect_script over a whole text file, read CLI_CHUNK_SIZE characters
+    at a time. Gives the same answer as detecting on the full text.
+    """
+    found = set()
+    for chunk in iter(lambda: f.read(CLI_CHUNK_SIZE), ''):
+        lang = detect_script(chunk)
+        if lang == 'hi':
+            # Nothing outranks Devanagari; stop reading
+            return lang
+        found.add(lang)
+    for lang in ('ta', 'te'):
+        if lang in found:
+            return lang
+    return 'en'
+
+
+def read_chunks(f: TextIO) -> Iterator[str]:
+    """
+    Read a text file in pieces of at least CLI_CHUNK_SIZE characters.
+    
+    Files that fit in one chunk come back whole. Larger ones are cut only
+    after a line break, so no word (or multi-word entry) straddles a cut;
+    a single line longer than a chunk is kept in one piece.
+    """
+    parts: List[str] = []
+    size = 0
+    for chunk in iter(lambda: f.read(CLI_CHUNK_SIZE), ''):
+        parts.append(chunk)
+        size += len(chunk)
+        if size <= CLI_CHUNK_SIZE:
+            continue
+        cut = chunk.rfind('\n') + 1
+        if cut:
+            parts[-1] = chunk[:cut]
+            yield ''.join(parts)
+            parts = [chunk[cut:]]
+            size = len(parts[0])
+    tail = ''.join(parts)
+    if tail:
+        yield tail
+
+
+@contextlib.contextmanager
+def open_atomic(path: str) -> Iterator[TextIO]:
+    """
+    Open path for writing UTF-8 text through a temporary file beside it.
+    
+    path is only replaced once the block completes; if anything fails, the
+    temporary file is removed and path is left as it was.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'w', encoding='utf-8', buffering=CLI_CHUNK_SIZE) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
@@ -8,6 +8,7 @@ Filtering Strategy:
 - All profane words are REPLACED with appropriate synonyms when available
 - Words without synonyms are MASKED with asterisks (***)
 - Optional pure masking mode via use_synonyms=False parameter
+- Optional extra better-profanity pass when masking, via use_better_profanity=True
 
 Usage as a module:
     from safety_filter import SafetyFilter
@@ -24,21 +25,220 @@ Usage as a module:
 Usage from command line:
     python safety_filter.py input.txt output.txt
 
+Optional accelerators:
+    pip install hyperscan       # SIMD multi-word matching (preferred)
+    pip install pyahocorasick   # single-pass multi-word matching
+
 Author: Vamsi Krishnan
 Project: SIH 2025 - Content Localization Engine
 """
 
+import functools
+import hashlib
+import re
 import sys
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Set
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from safety_common import (
+    AHOCORASICK_AVAILABLE, BETTER_PROFANITY_AVAILABLE, HYPERSCAN_AVAILABLE,
+    build_trie, compile_alt, compile_hyperscan, compile_whole_words,
+    detect_file_script, detect_script, fold, hyperscan_matches, mask,
+    open_atomic, read_chunks, register_better_profanity, select_spans, splice
+)
 
-try:
+if BETTER_PROFANITY_AVAILABLE:
     from better_profanity import profanity
-    BETTER_PROFANITY_AVAILABLE = True
-except ImportError:
-    BETTER_PROFANITY_AVAILABLE = False
-    print("Warning: better-profanity not installed. Install with: pip install better-profanity")
+if AHOCORASICK_AVAILABLE:
+    import ahocorasick
+if HYPERSCAN_AVAILABLE:
+    import hyperscan
+
+
+# filter() remembers its most recent results for short texts, which tend to
+# recur (greetings, stock phrases); long texts are not worth holding on to
+_RESULT_CACHE_SIZE = 4096
+_RESULT_CACHE_MAX_CHARS = 1024
+
+# Where compiled Hyperscan databases are kept when SafetyFilter(cache=True)
+_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'safety_layer'
+)
+
+# Bumped whenever compile_hyperscan changes how words are compiled, so
+# databases cached by an older version are not picked up
+_DATABASE_VERSION = 2
+
+
+# Static wordlists, built once at import and shared read-only by every filter
+
+# Highly abusive/explicit words: extreme profanity, sexual explicit terms, etc.
+_HIGHLY_ABUSIVE: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "en": (
+        # Extreme profanity
+        "fuck", "fucking", "shit", "bitch", "asshole", "bastard",
+        "dickhead", "prick", "cock", "pussy", "crap", "damn", "hell",
+        "ass", "dumbass"
+    ),
+    "hi": (
+        # Highly abusive Hindi words
+        "चूतिया", "chutiya", "मादरचोद", "madarchod",
+        "बहनचोद", "behenchod", "भोसडीके", "bhosadike",
+        "लौडा", "lauda", "लंड", "lund", "गांडू", "gandu",
+        "झाटू", "jhatu", "भोसडा", "bhosda", "रांड", "randi",
+        "चुतियापा", "chutiyapa", "बकचोद", "bakchod"
+    ),
+    "ta": (
+        # Highly abusive Tamil words
+        "புண்டா", "punda", "ஓத்தா", "otha",
+        "ஓம்பு", "ombu", "தேவடியா", "thevidiya",
+        "குத்தி", "koothi", "பூல்", "pul"
+    ),
+    "te": (
+        # Highly abusive Telugu words
+        "పూకు", "pooku", "లండ", "land",
+        "బోడు", "bodu", "కూతురు", "kothuru",
+        "పూరి", "poori", "lanjakoduku"
+    )
+})
+
+# Racial slurs and derogatory terms: identity-based insults, mild profanity, etc.
+_RACIAL_SLURS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "en": (
+        # Racial/derogatory slurs
+        "stupid", "idiot", "fool", "dumb", "moron",
+        "retard", "retarded", "imbecile", "jerk", "loser",
+        "scum", "trash", "garbage", "worthless", "pathetic"
+    ),
+    "hi": (
+        # Derogatory Hindi terms
+        "बेवकूफ़", "बेवकूफ", "bewakoof", "bewakuf",
+        "मूर्ख", "गधा", "gadha", "उल्लू", "ullu",
+        "हरामी", "harami", "हरामज़ादा", "haramzada",
+        "कमीना", "kamina", "कमीने", "kamine",
+        "कुत्ता", "kutta", "कुत्ते", "kutte",
+        "सुअर", "suar", "बकवास", "bakwas",
+        "गाली", "gaali", "गंदा", "ganda", "ब्लडी फूल", "bloody fool"
+    ),
+    "ta": (
+        # Derogatory Tamil terms
+        "முட்டாள்", "muttaal", "பைத்தியம்", "paithiyam",
+        "கழுதை", "kazhudhai", "நாய்", "naai",
+        "பன்னி", "panni", "பண்ணி",
+        "loosu", "porukki", "kirukku"
+    ),
+    "te": (
+        # Derogatory Telugu terms
+        "మూర్ఖుడు", "moorkhhudu", "వెధవ", "vedava",
+        "గాడిదేడు", "gadidhedu", "గోవు", "govu",
+        "కుక్క", "kukka", "పంది", "pandi",
+        "ద్రోహి", "drohi", "gadu"
+    )
+})
+
+# Appropriate synonym replacements for all profane words
+_SYNONYMS: Mapping[str, Mapping[str, str]] = MappingProxyType({
+    "en": MappingProxyType({
+        # Synonyms for highly abusive words
+        "fuck": "extremely bad", "fucking": "very", "shit": "nonsense",
+        "bitch": "difficult person", "asshole": "unpleasant person",
+        "bastard": "difficult person", "dickhead": "rude person",
+        "prick": "annoying person", "damn": "darn", "hell": "heck",
+        "crap": "nonsense", "ass": "fool", "dumbass": "misguided person",
+        # Synonyms for derogatory terms
+        "stupid": "unwise", "idiot": "inexperienced person",
+        "fool": "naive person", "dumb": "uninformed",
+        "moron": "confused person", "retard": "challenged person",
+        "retarded": "developmentally different", "imbecile": "uninformed person",
+        "jerk": "rude person", "loser": "unsuccessful person",
+        "scum": "unpleasant person", "trash": "undesirable",
+        "garbage": "poor quality", "worthless": "unvalued",
+        "pathetic": "unfortunate"
+    }),
+    "hi": MappingProxyType({
+        # Synonyms for highly abusive Hindi words
+        "चूतिया": "मूर्ख", "chutiya": "moorkhh",
+        "मादरचोद": "अत्यंत बुरा", "madarchod": "atyant bura",
+        "बहनचोद": "अत्यंत बुरा", "behenchod": "atyant bura",
+        "भोसडीके": "बुरा व्यक्ति", "bhosadike": "bura vyakti",
+        "रांड": "बुरी महिला", "randi": "buri mahila",
+        "चुतियापा": "बेकार काम", "chutiyapa": "bekaar kaam",
+        "बकचोद": "बकवास करने वाला", "bakchod": "bakwas karne wala",
+        # Synonyms for derogatory Hindi terms
+        "बेवकूफ़": "अनजान", "बेवकूफ": "अनजान",
+        "bewakoof": "anjaan", "bewakuf": "anjaan",
+        "मूर्ख": "अज्ञानी", "गधा": "नासमझ", "gadha": "nasamajh",
+        "उल्लू": "भोला", "ullu": "bhola",
+        "हरामी": "बुरा व्यक्ति", "harami": "bura vyakti",
+        "हरामज़ादा": "अविश्वासी व्यक्ति", "haramzada": "avishvaasi vyakti",
+        "कमीना": "बुरा व्यक्ति", "kamina": "bura vyakti",
+        "कमीने": "बुरे लोग", "kamine": "bure log",
+        "कुत्ता": "नीच व्यक्ति", "kutta": "neech vyakti",
+        "कुत्ते": "नीच लोग", "kutte": "neech log",
+        "सुअर": "अस्वच्छ व्यक्ति", "suar": "asvachh vyakti",
+        "बकवास": "बेकार बात", "bakwas": "bekaar baat",
+        "गाली": "अपमानजनक शब्द", "gaali": "apmaanjanak shabd",
+        "गंदा": "अशुभ", "ganda": "ashubh",
+        "ब्लडी फूल": "मूर्ख", "bloody fool": "moorkhh"
+    }),
+    "ta": MappingProxyType({
+        # Synonyms for highly abusive Tamil words
+        "புண்டா": "மோசமானவர்", "punda": "mosamaanavar",
+        "ஓத்தா": "மிக மோசம்", "otha": "miga mosam",
+        "ஓம்பு": "மிக மோசம்", "ombu": "miga mosam",
+        "தேவடியா": "கெட்டவர்", "thevidiya": "kettavar",
+        "குத்தி": "கெட்டவர்", "koothi": "kettavar",
+        "பூல்": "மோசம்", "pul": "mosam",
+        # Synonyms for derogatory Tamil terms
+        "முட்டாள்": "அறியாதவர்", "muttaal": "ariyathavar",
+        "பைத்தியம்": "குழப்பமானவர்", "paithiyam": "kuzhhappamanavar",
+        "கழுதை": "மூடனம்றவர்", "kazhudhai": "mudanamravar",
+        "நாய்": "தீயவர்", "naai": "theeyavar",
+        "பன்னி": "தீயவர்", "panni": "theeyavar",
+        "loosu": "theriyadhavar", "porukki": "kettavar",
+        "kirukku": "pizhhaiyaanavar"
+    }),
+    "te": MappingProxyType({
+        # Synonyms for highly abusive Telugu words
+        "పూకు": "చెడ్డది", "pooku": "cheddadi",
+        "లండ": "చెడ్డది", "land": "cheddadi",
+        "బోడు": "చెడ్డ వ్యక్తి", "bodu": "chedda vyakthi",
+        "కూతురు": "చెడ్డది", "kothuru": "cheddadi",
+        "పూరి": "చెడ్డది", "poori": "cheddadi",
+        "lanjakoduku": "chedda vyakthi",
+        # Synonyms for derogatory Telugu terms
+        "మూర్ఖుడు": "తెలియని వ్యక్తి", "moorkhhudu": "teliyani vyakthi",
+        "వెధవ": "అనుభవం లేని వారు", "vedava": "anubhavam leni vaaru",
+        "గాడిదేడు": "మూర్ఖుడు", "gadidhedu": "moorkhhudu",
+        "గోవు": "మూఢనంమైన వ్యక్తి", "govu": "mudanamaina vyakthi",
+        "కుక్క": "తప్పుడు వ్యక్తి", "kukka": "thappudu vyakthi",
+        "పంది": "మూఢనంమైన వ్యక్తి", "pandi": "mudanamaina vyakthi",
+        "ద్రోహి": "తప్పు మనసు ఉన్న వ్యక్తి", "drohi": "thappu manasu unna vyakthi",
+        "gadu": "chedda vyakthi"
+    })
+})
+
+
+@functools.lru_cache(maxsize=None)
+def _load_lang(lang: str) -> Mapping[str, Tuple[str, str]]:
+    """
+    Build a language's replacement table on first use, shared by every filter.
+    
+    Maps each lowercased profane word to its original form and replacement
+    (synonym, or mask if no synonym is defined).
+    """
+    synonyms = {k.lower(): v for k, v in _SYNONYMS.get(lang, {}).items()}
+    table = {}
+    for word in _HIGHLY_ABUSIVE.get(lang, ()) + _RACIAL_SLURS.get(lang, ()):
+        key = word.lower()
+        table[key] = (word, synonyms.get(key) or mask(len(word)))
+    return MappingProxyType(table)
 
 
 @dataclass
@@ -63,20 +263,25 @@ class SafetyFilter:
     
     Attributes:
         language (str): Target language code ('en', 'hi', 'ta', 'te')
-        highly_abusive (dict): Highly offensive words per language
-        racial_slurs (dict): Derogatory terms per language
-        synonyms (dict): Appropriate replacements
+        highly_abusive (mapping): Highly offensive words per language (read-only)
+        racial_slurs (mapping): Derogatory terms per language (read-only)
+        synonyms (mapping): Appropriate replacements (read-only)
     """
     
     SUPPORTED_LANGUAGES = ['en', 'hi', 'ta', 'te']
     
-    def __init__(self, language: str = 'en', auto_detect: bool = False):
+    def __init__(self, language: str = 'en', auto_detect: bool = False,
+                 use_better_profanity: bool = False, cache: bool = False):
         """
         Initialize the SafetyFilter.
         
         Args:
             language: Language code ('en', 'hi', 'ta', 'te'). Default: 'en'
             auto_detect: If True, automatically detect language from input text
+            use_better_profanity: If True, masking mode also censors words from
+                better-profanity's own wordlist (requires better-profanity)
+            cache: If True, keep compiled Hyperscan databases on disk and reuse
+                them across processes instead of recompiling
         
         Raises:
             ValueError: If language is not supported
@@ -89,194 +294,152 @@ class SafetyFilter:
         
         self.language = language
         self.auto_detect = auto_detect
+        self.use_better_profanity = use_better_profanity and BETTER_PROFANITY_AVAILABLE
+        self.cache = cache
         
-        # Load better-profanity if available
-        if BETTER_PROFANITY_AVAILABLE:
-            profanity.load_censor_words()
+        # better-profanity is only set up on the first masking pass that needs it
+        if use_better_profanity and not BETTER_PROFANITY_AVAILABLE:
+            print("Warning: better-profanity not installed. Install with: pip install better-profanity")
+        self._bp_ready = False
         
-        # Initialize wordlists
+        # Bind the shared, read-only wordlists
         self.highly_abusive = self._load_highly_abusive_words()
         self.racial_slurs = self._load_racial_slurs()
         self.synonyms = self._load_synonyms()
         
-        # Add all words to better-profanity for detection
-        if BETTER_PROFANITY_AVAILABLE and language in self.highly_abusive:
-            all_words = self.highly_abusive.get(language, []) + self.racial_slurs.get(language, [])
-            profanity.add_censor_words(all_words)
+        # LRU of recent filter() results, keyed on the input and settings
+        self._results: OrderedDict = OrderedDict()
+        self._results_lock = threading.Lock()
+        
+        # Compiled matchers are shared process-wide, built once per language
+        # on first use (see the lru_cache'd builders)
+        if HYPERSCAN_AVAILABLE:
+            self._get_database(language)
+        elif AHOCORASICK_AVAILABLE:
+            self._get_automaton(language)
+        else:
+            self._get_pattern(language)
+    
+    def _ensure_better_profanity(self) -> None:
+        """Register this filter's words with better-profanity before its first censor pass"""
+        if not self._bp_ready:
+            register_better_profanity(
+                self.highly_abusive.get(self.language, ()) + self.racial_slurs.get(self.language, ())
+            )
+            self._bp_ready = True
     
-    def _load_highly_abusive_words(self) -> Dict[str, List[str]]:
+    @classmethod
+    def _load_highly_abusive_words(cls) -> Mapping[str, Tuple[str, ...]]:
         """
         Load highly abusive/explicit words.
         These are extreme profanity, sexual explicit terms, etc.
         """
-        return {
-            "en": [
-                # Extreme profanity
-                "fuck", "fucking", "shit", "bitch", "asshole", "bastard",
-                "dickhead", "prick", "cock", "pussy", "crap", "damn", "hell",
-                "ass", "dumbass"
-            ],
-            "hi": [
-                # Highly abusive Hindi words
-                "चूतिया", "chutiya", "मादरचोद", "madarchod",
-                "बहनचोद", "behenchod", "भोसडीके", "bhosadike",
-                "लौडा", "lauda", "लंड", "lund", "गांडू", "gandu",
-                "झाटू", "jhatu", "भोसडा", "bhosda", "रांड", "randi",
-                "चुतियापा", "chutiyapa", "बकचोद", "bakchod"
-            ],
-            "ta": [
-                # Highly abusive Tamil words
-                "புண்டா", "punda", "ஓத்தா", "otha",
-                "ஓம்பு", "ombu", "தேவடியா", "thevidiya",
-                "குத்தி", "koothi", "பூல்", "pul"
-            ],
-            "te": [
-                # Highly abusive Telugu words
-                "పూకు", "pooku", "లండ", "land",
-                "బోడు", "bodu", "కూతురు", "kothuru",
-                "పూరి", "poori", "lanjakoduku"
-            ]
-        }
-    
-    def _load_racial_slurs(self) -> Dict[str, List[str]]:
+        return _HIGHLY_ABUSIVE
+    
+    @classmethod
+    def _load_racial_slurs(cls) -> Mapping[str, Tuple[str, ...]]:
         """
         Load racial slurs and derogatory terms.
         These include identity-based insults, mild profanity, etc.
         """
-        return {
-            "en": [
-                # Racial/derogatory slurs
-                "stupid", "idiot", "fool", "dumb", "moron",
-                "retard", "retarded", "imbecile", "jerk", "loser",
-                "scum", "trash", "garbage", "worthless", "pathetic"
-            ],
-            "hi": [
-                # Derogatory Hindi terms
-                "बेवकूफ़", "बेवकूफ", "bewakoof", "bewakuf",
-                "मूर्ख", "गधा", "gadha", "उल्लू", "ullu",
-                "हरामी", "harami", "हरामज़ादा", "haramzada",
-                "कमीना", "kamina", "कमीने", "kamine",
-                "कुत्ता", "kutta", "कुत्ते", "kutte",
-                "सुअर", "suar", "बकवास", "bakwas",
-                "गाली", "gaali", "गंदा", "ganda", "ब्लडी फूल", "bloody fool"
-            ],
-            "ta": [
-                # Derogatory Tamil terms
-                "முட்டாள்", "muttaal", "பைத்தியம்", "paithiyam",
-                "கழுதை", "kazhudhai", "நாய்", "naai",
-                "பன்னி", "panni", "பண்ணி",
-                "loosu", "porukki", "kirukku"
-            ],
-            "te": [
-                # Derogatory Telugu terms
-                "మూర్ఖుడు", "moorkhhudu", "వెధవ", "vedava",
-                "గాడిదేడు", "gadidhedu", "గోవు", "govu",
-                "కుక్క", "kukka", "పంది", "pandi",
-                "ద్రోహి", "drohi", "gadu"
-            ]
-        }
-    
-    def _load_synonyms(self) -> Dict[str, Dict[str, str]]:
+        return _RACIAL_SLURS
+    
+    @classmethod
+    def _load_synonyms(cls) -> Mapping[str, Mapping[str, str]]:
         """Load appropriate synonym replacements for all profane words"""
-        return {
-            "en": {
-                # Synonyms for highly abusive words
-                "fuck": "extremely bad", "fucking": "very", "shit": "nonsense",
-                "bitch": "difficult person", "asshole": "unpleasant person",
-                "bastard": "difficult person", "dickhead": "rude person",
-                "prick": "annoying person", "damn": "darn", "hell": "heck",
-                "crap": "nonsense", "ass": "fool", "dumbass": "misguided person",
-                # Synonyms for derogatory terms
-                "stupid": "unwise", "idiot": "inexperienced person",
-                "fool": "naive person", "dumb": "uninformed",
-                "moron": "confused person", "retard": "challenged person",
-                "retarded": "developmentally different", "imbecile": "uninformed person",
-                "jerk": "rude person", "loser": "unsuccessful person",
-                "scum": "unpleasant person", "trash": "undesirable",
-                "garbage": "poor quality", "worthless": "unvalued",
-                "pathetic": "unfortunate"
-            },
-            "hi": {
-                # Synonyms for highly abusive Hindi words
-                "चूतिया": "मूर्ख", "chutiya": "moorkhh",
-                "मादरचोद": "अत्यंत बुरा", "madarchod": "atyant bura",
-                "बहनचोद": "अत्यंत बुरा", "behenchod": "atyant bura",
-                "भोसडीके": "बुरा व्यक्ति", "bhosadike": "bura vyakti",
-                "रांड": "बुरी महिला", "randi": "buri mahila",
-                "चुतियापा": "बेकार काम", "chutiyapa": "bekaar kaam",
-                "बकचोद": "बकवास करने वाला", "bakchod": "bakwas karne wala",
-                # Synonyms for derogatory Hindi terms
-                "बेवकूफ़": "अनजान", "बेवकूफ": "अनजान",
-                "bewakoof": "anjaan", "bewakuf": "anjaan",
-                "मूर्ख": "अज्ञानी", "गधा": "नासमझ", "gadha": "nasamajh",
-                "उल्लू": "भोला", "ullu": "bhola",
-                "हरामी": "बुरा व्यक्ति", "harami": "bura vyakti",
-                "हरामज़ादा": "अविश्वासी व्यक्ति", "haramzada": "avishvaasi vyakti",
-                "कमीना": "बुरा व्यक्ति", "kamina": "bura vyakti",
-                "कमीने": "बुरे लोग", "kamine": "bure log",
-                "कुत्ता": "नीच व्यक्ति", "kutta": "neech vyakti",
-                "कुत्ते": "नीच लोग", "kutte": "neech log",
-                "सुअर": "अस्वच्छ व्यक्ति", "suar": "asvachh vyakti",
-                "बकवास": "बेकार बात", "bakwas": "bekaar baat",
-                "गाली": "अपमानजनक शब्द", "gaali": "apmaanjanak shabd",
-                "गंदा": "अशुभ", "ganda": "ashubh",
-                "ब्लडी फूल": "मूर्ख", "bloody fool": "moorkhh"
-            },
-            "ta": {
-                # Synonyms for highly abusive Tamil words
-                "புண்டா": "மோசமானவர்", "punda": "mosamaanavar",
-                "ஓத்தா": "மிக மோசம்", "otha": "miga mosam",
-                "ஓம்பு": "மிக மோசம்", "ombu": "miga mosam",
-                "தேவடியா": "கெட்டவர்", "thevidiya": "kettavar",
-                "குத்தி": "கெட்டவர்", "koothi": "kettavar",
-                "பூல்": "மோசம்", "pul": "mosam",
-                # Synonyms for derogatory Tamil terms
-                "முட்டாள்": "அறியாதவர்", "muttaal": "ariyathavar",
-                "பைத்தியம்": "குழப்பமானவர்", "paithiyam": "kuzhhappamanavar",
-                "கழுதை": "மூடனம்றவர்", "kazhudhai": "mudanamravar",
-                "நாய்": "தீயவர்", "naai": "theeyavar",
-                "பன்னி": "தீயவர்", "panni": "theeyavar",
-                "loosu": "theriyadhavar", "porukki": "kettavar",
-                "kirukku": "pizhhaiyaanavar"
-            },
-            "te": {
-                # Synonyms for highly abusive Telugu words
-                "పూకు": "చెడ్డది", "pooku": "cheddadi",
-                "లండ": "చెడ్డది", "land": "cheddadi",
-                "బోడు": "చెడ్డ వ్యక్తి", "bodu": "chedda vyakthi",
-                "కూతురు": "చెడ్డది", "kothuru": "cheddadi",
-                "పూరి": "చెడ్డది", "poori": "cheddadi",
-                "lanjakoduku": "chedda vyakthi",
-                # Synonyms for derogatory Telugu terms
-                "మూర్ఖుడు": "తెలియని వ్యక్తి", "moorkhhudu": "teliyani vyakthi",
-                "వెధవ": "అనుభవం లేని వారు", "vedava": "anubhavam leni vaaru",
-                "గాడిదేడు": "మూర్ఖుడు", "gadidhedu": "moorkhhudu",
-                "గోవు": "మూఢనంమైన వ్యక్తి", "govu": "mudanamaina vyakthi",
-                "కుక్క": "తప్పుడు వ్యక్తి", "kukka": "thappudu vyakthi",
-                "పంది": "మూఢనంమైన వ్యక్తి", "pandi": "mudanamaina vyakthi",
-                "ద్రోహి": "తప్పు మనసు ఉన్న వ్యక్తి", "drohi": "thappu manasu unna vyakthi",
-                "gadu": "chedda vyakthi"
-            }
-        }
-    
-    def detect_language(self, text: str) -> str:
-        """Auto-detect language from Unicode script"""
-        devanagari = sum(1 for c in text if '\u0900' <= c <= '\u097F')
-        tamil = sum(1 for c in text if '\u0B80' <= c <= '\u0BFF')
-        telugu = sum(1 for c in text if '\u0C00' <= c <= '\u0C7F')
+        return _SYNONYMS
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_automaton(lang: str):
+        """Get the Aho-Corasick automaton for a language, building it on first use"""
+        automaton = ahocorasick.Automaton()
+        for key, value in _load_lang(lang).items():
+            automaton.add_word(key, value)
+        automaton.make_automaton()
+        return automaton
+    
+    def _get_database(self, lang: str):
+        """
+        Get the Hyperscan database for a language, compiling it on first use.
+        
+        Returns:
+            The database, each word's (word, replacement) entry and each
+            word's UTF-8 length, both indexed by pattern id
+        """
+        return self._compile_database(lang, self.cache)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _compile_database(cls, lang: str, use_disk_cache: bool):
+        """Compile (or load from disk) a language's Hyperscan database, once per process"""
+        table = _load_lang(lang)
+        keys = list(table)
+        entries = [table[k] for k in keys]
+        lengths = [len(k.encode('utf-8')) for k in keys]
+        
+        cache_path = cls._database_cache_path(lang, keys) if use_disk_cache else None
+        database = cls._load_database(cache_path) if cache_path else None
+        if database is None:
+            database = compile_hyperscan(keys)
+            if cache_path:
+                cls._save_database(cache_path, database)
+        return database, entries, lengths
+    
+    @staticmethod
+    def _database_cache_path(lang: str, keys: List[str]) -> str:
+        """Cache file for a database, keyed by a hash of its words in pattern-id order"""
+        digest = hashlib.sha256(repr(keys).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(_CACHE_DIR, f"{lang}_v{_DATABASE_VERSION}_{digest}.hsdb")
+    
+    @staticmethod
+    def _load_database(path: str):
+        """Load a serialized Hyperscan database, or None if missing or unusable"""
+        try:
+            with open(path, 'rb') as f:
+                return hyperscan.loadb(f.read(), hyperscan.HS_MODE_BLOCK)
+        except (OSError, hyperscan.error):
+            return None
+    
+    @staticmethod
+    def _save_database(path: str, database) -> None:
+        """Best-effort write of a compiled database to the on-disk cache"""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(hyperscan.dumpb(database))
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_pattern(lang: str) -> re.Pattern:
+        """
+        Get the whole-word alternation regex for a language, compiling it on first use.
         
-        if devanagari > 0:
-            return 'hi'
-        elif tamil > 0:
-            return 'ta'
-        elif telugu > 0:
-            return 'te'
-        return 'en'
+        The alternation is prefix-factored, so longer words still win over
+        their prefixes. Lookarounds are used instead of \\b, which misfires
+        next to Indic vowel signs, and they count combining marks as part of
+        a word. Words are lowercase and the pattern runs over folded text, so
+        no IGNORECASE is needed.
+        """
+        alternation = compile_alt(build_trie(_load_lang(lang)))
+        return compile_whole_words(alternation)
+    
+    @staticmethod
+    def detect_language(text: str) -> str:
+        """Auto-detect language from Unicode script (callable on the class too)"""
+        return detect_script(text)
     
     def filter(self, text: str, use_synonyms: bool = True) -> str:
         """
         Filter profanity from text (simple interface).
         
+        Results for short texts are kept in a per-filter LRU cache, so
+        repeated inputs skip the scan entirely.
+        
         Args:
             text: Input text to filter
             use_synonyms: Replace with synonyms if True, mask with * if False
@@ -284,10 +447,25 @@ class SafetyFilter:
         Returns:
             Cleaned text string
         """
-        result = self.filter_detailed(text, use_synonyms)
-        return result.cleaned_text
+        if len(text) > _RESULT_CACHE_MAX_CHARS:
+            return self.filter_detailed(text, use_synonyms, collect_metadata=False).cleaned_text
+        
+        key = (text, use_synonyms, self.language, self.auto_detect, self.use_better_profanity)
+        with self._results_lock:
+            cleaned = self._results.get(key)
+            if cleaned is not None:
+                self._results.move_to_end(key)
+                return cleaned
+        
+        cleaned = self.filter_detailed(text, use_synonyms, collect_metadata=False).cleaned_text
+        with self._results_lock:
+            self._results[key] = cleaned
+            if len(self._results) > _RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return cleaned
     
-    def filter_detailed(self, text: str, use_synonyms: bool = True) -> FilterResult:
+    def filter_detailed(self, text: str, use_synonyms: bool = True,
+                        collect_metadata: bool = True) -> FilterResult:
         """
         Filter profanity from text.
         
@@ -298,6 +476,8 @@ class SafetyFilter:
         Args:
             text: Input text to filter
             use_synonyms: Replace with synonyms if True, mask if False
+            collect_metadata: Fill in profane_words and replacements; when
+                False both are left empty and only cleaned_text is built
         
         Returns:
             FilterResult object with detailed information
@@ -308,50 +488,98 @@ class SafetyFilter:
         # Auto-detect language if enabled
         lang = self.detect_language(text) if self.auto_detect else self.language
         
-        # Union of all profane words for this language
-        all_words = set()
-        all_words.update(self.highly_abusive.get(lang, []))
-        all_words.update(self.racial_slurs.get(lang, []))
+        spans = self._find_spans(text, lang)
+        replacements = {}
+        if collect_metadata:
+            for start, end, word, rep in spans:
+                if word not in replacements:
+                    replacements[word] = rep if use_synonyms else mask(end - start)
+            cleaned = splice(text, spans, replacements)
+        elif use_synonyms:
+            cleaned = splice(text, spans)
+        else:
+            cleaned = splice(text, [(s, e, w, mask(e - s)) for s, e, w, _ in spans])
         
-        found = []
-        lower = text.lower()
-        for word in all_words:
-            if word.lower() in lower:
-                found.append(word)
+        if not use_synonyms and self.use_better_profanity:
+            # Also mask anything only better-profanity's own wordlist knows about
+            self._ensure_better_profanity()
+            cleaned = profanity.censor(cleaned)
         
-        cleaned = text
-        replacements = {}
+        return FilterResult(text, cleaned, list(replacements), replacements, lang)
+    
+    def filter_batch(self, texts: List[str], use_synonyms: bool = True,
+                     max_workers: Optional[int] = None) -> List[FilterResult]:
+        """
+        Filter many texts, reusing the compiled matchers for all of them.
         
-        if use_synonyms:
-            # Prefer synonyms; fallback to masking if no synonym exists
-            for word in found:
-                rep = self._get_synonym(word, lang)
-                if rep == word:          # no synonym defined
-                    rep = '*' * len(word)
-                cleaned = self._replace_word(cleaned, word, rep)
-                replacements[word] = rep
+        Hyperscan releases the GIL while scanning, so with it installed the
+        texts are spread over a thread pool. The other backends hold the GIL,
+        so by default they run serially.
+        
+        Args:
+            texts: Input texts to filter
+            use_synonyms: Replace with synonyms if True, mask if False
+            max_workers: Worker threads (default: CPU count with Hyperscan, else 1)
+        
+        Returns:
+            One FilterResult per input text, in order
+        """
+        if max_workers is None:
+            max_workers = (os.cpu_count() or 1) if HYPERSCAN_AVAILABLE else 1
+        if max_workers <= 1 or len(texts) < 2:
+            return [self.filter_detailed(text, use_synonyms) for text in texts]
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                functools.partial(self.filter_detailed, use_synonyms=use_synonyms), texts
+            ))
+    
+    def _find_spans(self, text: str, lang: str) -> List[Tuple[int, int, str, str]]:
+        """
+        Find whole-word profanity matches in a single pass over the text.
+        
+        Returns:
+            Non-overlapping (start, end, word, replacement) tuples in text order,
+            preferring the longest word when several start at the same position
+        """
+        if HYPERSCAN_AVAILABLE:
+            hits = self._scan_hyperscan(text, lang)
+        elif AHOCORASICK_AVAILABLE:
+            hits = self._scan_automaton(text, lang)
         else:
-            # Pure masking mode
-            if BETTER_PROFANITY_AVAILABLE:
-                cleaned = profanity.censor(text)
-            for word in found:
-                masked = '*' * len(word)
-                cleaned = self._replace_word(cleaned, word, masked)
-                replacements[word] = masked
+            # The regex already yields ordered, non-overlapping whole words
+            return self._scan_pattern(text, lang)
         
-        return FilterResult(text, cleaned, list(set(found)), replacements, lang)
+        return select_spans(text, hits)
     
-    def _get_synonym(self, word: str, lang: str) -> str:
-        """Get appropriate synonym if available; otherwise return original."""
-        synonyms = self.synonyms.get(lang, {})
-        rep = synonyms.get(word.lower()) or synonyms.get(word)
-        return rep if rep else word
+    def _scan_automaton(self, text: str, lang: str) -> List[Tuple[int, int, str, str]]:
+        """Collect every (possibly overlapping) match with the Aho-Corasick automaton"""
+        hits = []
+        for end_idx, (word, rep) in self._get_automaton(lang).iter(fold(text)):
+            hits.append((end_idx - len(word) + 1, end_idx + 1, word, rep))
+        return hits
     
-    def _replace_word(self, text: str, word: str, replacement: str) -> str:
-        """Replace word in text while preserving boundaries"""
-        import re
-        pattern = re.compile(r'\b' + re.escape(word) + r'\b', re.IGNORECASE)
-        return pattern.sub(replacement, text)
+    def _scan_pattern(self, text: str, lang: str) -> List[Tuple[int, int, str, str]]:
+        """Collect whole-word matches with the precompiled alternation regex"""
+        table = _load_lang(lang)
+        return [
+            match.span() + table[match.group(1)]
+            for match in self._get_pattern(lang).finditer(fold(text))
+        ]
+    
+    def _scan_hyperscan(self, text: str, lang: str) -> List[Tuple[int, int, str, str]]:
+        """Collect every (possibly overlapping) match with the Hyperscan database"""
+        database, entries, lengths = self._get_database(lang)
+        return [
+            (s, e) + entries[idx]
+            for s, e, idx in hyperscan_matches(database, lengths, fold(text))
+        ]
+
+
+@functools.lru_cache(maxsize=8)
+def _get_filter(language: str) -> SafetyFilter:
+    """Shared SafetyFilter per language, so repeated filter_text calls skip setup"""
+    return SafetyFilter(language=language)
 
 
 # Convenience function for quick filtering
@@ -367,11 +595,9 @@ def filter_text(text: str, language: str = 'en', use_synonyms: bool = True) -> s
     Returns:
         Cleaned text
     """
-    filter = SafetyFilter(language=language)
-    return filter.filter(text, use_synonyms=use_synonyms)
+    return _get_filter(language).filter(text, use_synonyms=use_synonyms)
 
 
-# Command-line interface
 def main():
     """CLI entry point"""
     if len(sys.argv) != 3:
@@ -384,22 +610,25 @@ def main():
         print(f"Error: Input file '{input_file}' not found!")
         sys.exit(1)
     
-    # Read input
-    with open(input_file, 'r', encoding='utf-8') as f:
-        text = f.read()
-    
-    # Filter with auto-detection
-    filter = SafetyFilter(auto_detect=True)
-    result = filter.filter_detailed(text)
+    # Detect the language once for the whole file, as if it were read in one go
+    with open(input_file, 'r', encoding='utf-8') as fin:
+        filter = SafetyFilter(language=detect_file_script(fin))
     
     # Create output directory
     output_dir = os.path.dirname(output_file)
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
     
-    # Write output
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(result.cleaned_text)
+    # Stream input to output in chunks, so memory stays flat for large files;
+    # every chunk is filtered in the file's language. output_file is only
+    # replaced once every chunk has been written
+    try:
+        with open(input_file, 'r', encoding='utf-8') as fin, open_atomic(output_file) as fout:
+            for piece in read_chunks(fin):
+                fout.write(filter.filter(piece))
+    except Exception as e:
+        print(f"Error writing output file: {e}")
+        sys.exit(1)
     
     print(f"Done: {output_file}")
 
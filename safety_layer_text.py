@@ -1,6 +1,7 @@
 """
 Safety layer class for text profanity filtering.
-Uses better-profanity and simple synonym logic to mask/replace abusive words.
+Uses per-language wordlists and simple synonym logic to mask/replace abusive
+words; better-profanity's wordlist can optionally be censored as well.
 
 Usage:
     python safety_layer_text.py <input_file_path> <output_file_path>
@@ -9,12 +10,159 @@ Example:
     python safety_layer_text.py p_text.txt output/cleaned.txt
 """
 
+import functools
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
-from better_profanity import profanity
+from safety_common import (
+    AHOCORASICK_AVAILABLE, BETTER_PROFANITY_AVAILABLE, HYPERSCAN_AVAILABLE,
+    build_trie, compile_alt, compile_hyperscan, compile_whole_words,
+    detect_file_script, detect_script, fold, hyperscan_matches, open_atomic,
+    read_chunks, register_better_profanity, select_spans, splice
+)
+
+if BETTER_PROFANITY_AVAILABLE:
+    from better_profanity import profanity
+if AHOCORASICK_AVAILABLE:
+    import ahocorasick
+
+
+# Wordlists and synonyms, built once at import and shared read-only by
+# every SafetyLayer
+
+# Expanded dictionaries with comprehensive profanity words
+_CUSTOM_WORDS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "en": (
+        # Common profanity
+        "stupid", "idiot", "fool", "dumb", "moron", "dumbass", "ass",
+        "bastard", "bitch", "damn", "hell", "crap", "shit", "fuck",
+        "fucking", "asshole", "dickhead", "prick", "cock", "pussy",
+        "retard", "retarded", "imbecile", "jerk", "loser", "scum",
+        "trash", "garbage", "worthless", "pathetic"
+    ),
+    "hi": (
+        # Devanagari script
+        "बेवकूफ़", "बेवकूफ", "मूर्ख", "गधा", "उल्लू", "ब्लडी फूल",
+        "चूतिया", "हरामी", "हरामज़ादा", "कमीना", "कमीने", "कुत्ता", "कुत्ते",
+        "मादरचोद", "बहनचोद", "भोसडीके", "लौडा", "लंड",
+        "गांडू", "झाटू", "भोसडा", "रांड", "सुअर",
+        "चुतियापा", "बकवास", "बकचोद", "गाली", "गंदा",
+        # Romanized/Hinglish
+        "bewakoof", "bewakuf", "gadha", "ullu", "bloody fool",
+        "chutiya", "harami", "haramzada", "kamina", "kamine",
+        "kutta", "kutte", "madarchod", "behenchod", "bhosadike",
+        "lauda", "lund", "gandu", "jhatu", "bhosda", "randi",
+        "suar", "chutiyapa", "bakwas", "bakchod", "gaali", "ganda"
+    ),
+    "ta": (
+        # Tamil script
+        "முட்டாள்", "பைத்தியம்", "கழுதை", "நாய்",
+        "புண்டா", "ஓத்தா", "ஓம்பு", "தேவடியா",
+        "குத்தி", "பன்னி", "பூல்", "பண்ணி",
+        # Romanized Tamil
+        "muttaal", "paithiyam", "kazhudhai", "naai", "punda",
+        "otha", "ombu", "thevidiya", "koothi", "panni", "pul", "panni",
+        "loosu", "porukki", "kirukku"
+    ),
+    "te": (
+        # Telugu script
+        "మూర్ఖుడు", "వెధవ", "గాడిదేడు", "గోవు",
+        "కుక్క", "పంది", "పూకు", "ద్రోహి",
+        "లండ", "బోడు", "కూతురు", "పూరి",
+        # Romanized Telugu
+        "moorkhhudu", "vedava", "gadidhedu", "govu", "kukka",
+        "pandi", "pooku", "drohi", "land", "bodu", "kothuru", "poori",
+        "gadu", "lanjakoduku"
+    )
+})
+
+_SYNONYMS: Mapping[str, Mapping[str, str]] = MappingProxyType({
+    "en": MappingProxyType({
+        # Milder/appropriate replacements
+        "stupid": "unwise",
+        "idiot": "inexperienced person",
+        "fool": "naive person",
+        "dumb": "uninformed",
+        "moron": "confused person",
+        "dumbass": "misguided individual",
+        "bastard": "difficult person",
+        "damn": "darn",
+        "hell": "heck",
+        "crap": "nonsense",
+        "jerk": "rude person",
+        "loser": "unsuccessful person",
+        "scum": "unpleasant person",
+        "trash": "worthless",
+        "garbage": "poor quality",
+        "pathetic": "unfortunate"
+    }),
+    "hi": MappingProxyType({
+        # Devanagari replacements
+        "बेवकूफ़": "अनजान",
+        "बेवकूफ": "अनजान",
+        "मूर्ख": "अज्ञानी",
+        "गधा": "नासमझ",
+        "उल्लू": "भोला",
+        "ब्लडी फूल": "मूर्ख",
+        "कमीना": "बुरा व्यक्ति",
+        "कमीने": "बुरे लोग",
+        "कुत्ता": "नीच व्यक्ति",
+        "कुत्ते": "नीच लोग",
+        "बकवास": "बेकार बात",
+        "गाली": "अपमानजनक शब्द",
+        "गंदा": "अशुभ",
+        # Romanized replacements
+        "bewakoof": "anjaan",
+        "bewakuf": "anjaan",
+        "gadha": "nasamajh",
+        "ullu": "bhola",
+        "bloody fool": "moorkhh",
+        "kamina": "bura vyakti",
+        "kamine": "bure log",
+        "kutta": "neech vyakti",
+        "kutte": "neech log",
+        "bakwas": "bekaar baat",
+        "gaali": "apmaanjanak shabd",
+        "ganda": "ashubh"
+    }),
+    "ta": MappingProxyType({
+        # Tamil replacements
+        "முட்டாள்": "அறியாதவர்",
+        "பைத்தியம்": "குழப்பமானவர்",
+        "கழுதை": "மூடனம்றவர்",
+        "நாய்": "தீயவர்",
+        "குத்தி": "தீயவர்",
+        "muttaal": "ariyathavar",
+        "paithiyam": "kuzhhappamanavar",
+        "kazhudhai": "mudanamravar",
+        "naai": "theeyavar",
+        "loosu": "theriyadhavar",
+        "porukki": "kettavar",
+        "kirukku": "pizhhaiyaanavar"
+    }),
+    "te": MappingProxyType({
+        # Telugu replacements
+        "మూర్ఖుడు": "తెలియని వ్యక్తి",
+        "వెధవ": "అనుభవం లేని వారు",
+        "గాడిదేడు": "మూర్ఖుడు",
+        "గోవు": "మూఢనంమైన వ్యక్తి",
+        "కుక్క": "తప్పుడు వ్యక్తి",
+        "పంది": "మూఢనంమైన వ్యక్తి",
+        "ద్రోహి": "తప్పు మనసు ఉన్న వ్యక్తి",
+        "moorkhhudu": "teliyani vyakthi",
+        "vedava": "anubhavam leni vaaru",
+        "gadidhedu": "moorkhhudu",
+        "govu": "mudanamaina vyakthi",
+        "kukka": "thappudu vyakthi",
+        "pandi": "mudanamaina vyakthi",
+        "drohi": "thappu manasu unna vyakthi",
+        "gadu": "chedda vyakthi"
+    })
+})
 
 
 @dataclass
@@ -27,202 +175,135 @@ class ProfanityFilterResult:
 
 
 class SafetyLayer:
-    def __init__(self, language: str = "en") -> None:
+    def __init__(self, language: str = "en", use_better_profanity: bool = False) -> None:
         self.language = language
-        profanity.load_censor_words()
+        # Masking mode also censors better-profanity's own wordlist on request;
+        # it is only set up on the first masking pass
+        self.use_better_profanity = use_better_profanity and BETTER_PROFANITY_AVAILABLE
+        if use_better_profanity and not BETTER_PROFANITY_AVAILABLE:
+            print("Warning: better-profanity not installed. Install with: pip install better-profanity")
+        self._bp_ready = False
+
+        # Bind the shared, read-only wordlists
+        self.custom_words = _CUSTOM_WORDS
+        self.synonyms = _SYNONYMS
+
+        self._words, self._matcher = self._compile_language(language)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _compile_language(language: str) -> Tuple[Mapping[str, Tuple[str, str, str]], Any]:
+        """
+        Build a language's word table and matcher, once per process.
 
-        # Expanded dictionaries with comprehensive profanity words
-        self.custom_words: Dict[str, List[str]] = {
-            "en": [
-                # Common profanity
-                "stupid", "idiot", "fool", "dumb", "moron", "dumbass", "ass",
-                "bastard", "bitch", "damn", "hell", "crap", "shit", "fuck",
-                "fucking", "asshole", "dickhead", "prick", "cock", "pussy",
-                "retard", "retarded", "imbecile", "jerk", "loser", "scum",
-                "trash", "garbage", "worthless", "pathetic"
-            ],
-            "hi": [
-                # Devanagari script
-                "बेवकूफ़", "बेवकूफ", "मूर्ख", "गधा", "उल्लू", "ब्लडी फूल",
-                "चूतिया", "हरामी", "हरामज़ादा", "कमीना", "कमीने", "कुत्ता", "कुत्ते",
-                "मादरचोद", "बहनचोद", "भोसडीके", "लौडा", "लंड",
-                "गांडू", "झाटू", "भोसडा", "रांड", "सुअर",
-                "चुतियापा", "बकवास", "बकचोद", "गाली", "गंदा",
-                # Romanized/Hinglish
-                "bewakoof", "bewakuf", "gadha", "ullu", "bloody fool",
-                "chutiya", "harami", "haramzada", "kamina", "kamine",
-                "kutta", "kutte", "madarchod", "behenchod", "bhosadike",
-                "lauda", "lund", "gandu", "jhatu", "bhosda", "randi",
-                "suar", "chutiyapa", "bakwas", "bakchod", "gaali", "ganda"
-            ],
-            "ta": [
-                # Tamil script
-                "முட்டாள்", "பைத்தியம்", "கழுதை", "நாய்",
-                "புண்டா", "ஓத்தா", "ஓம்பு", "தேவடியா",
-                "குத்தி", "பன்னி", "பூல்", "பண்ணி",
-                # Romanized Tamil
-                "muttaal", "paithiyam", "kazhudhai", "naai", "punda",
-                "otha", "ombu", "thevidiya", "koothi", "panni", "pul", "panni",
-                "loosu", "porukki", "kirukku"
-            ],
-            "te": [
-                # Telugu script
-                "మూర్ఖుడు", "వెధవ", "గాడిదేడు", "గోవు",
-                "కుక్క", "పంది", "పూకు", "ద్రోహి",
-                "లండ", "బోడు", "కూతురు", "పూరి",
-                # Romanized Telugu
-                "moorkhhudu", "vedava", "gadidhedu", "govu", "kukka",
-                "pandi", "pooku", "drohi", "land", "bodu", "kothuru", "poori",
-                "gadu", "lanjakoduku"
-            ]
-        }
-        
-        self.synonyms: Dict[str, Dict[str, str]] = {
-            "en": {
-                # Milder/appropriate replacements
-                "stupid": "unwise",
-                "idiot": "inexperienced person",
-                "fool": "naive person",
-                "dumb": "uninformed",
-                "moron": "confused person",
-                "dumbass": "misguided individual",
-                "bastard": "difficult person",
-                "damn": "darn",
-                "hell": "heck",
-                "crap": "nonsense",
-                "jerk": "rude person",
-                "loser": "unsuccessful person",
-                "scum": "unpleasant person",
-                "trash": "worthless",
-                "garbage": "poor quality",
-                "pathetic": "unfortunate"
-            },
-            "hi": {
-                # Devanagari replacements
-                "बेवकूफ़": "अनजान",
-                "बेवकूफ": "अनजान",
-                "मूर्ख": "अज्ञानी",
-                "गधा": "नासमझ",
-                "उल्लू": "भोला",
-                "ब्लडी फूल": "मूर्ख",
-                "कमीना": "बुरा व्यक्ति",
-                "कमीने": "बुरे लोग",
-                "कुत्ता": "नीच व्यक्ति",
-                "कुत्ते": "नीच लोग",
-                "बकवास": "बेकार बात",
-                "गाली": "अपमानजनक शब्द",
-                "गंदा": "अशुभ",
-                # Romanized replacements
-                "bewakoof": "anjaan",
-                "bewakuf": "anjaan",
-                "gadha": "nasamajh",
-                "ullu": "bhola",
-                "bloody fool": "moorkhh",
-                "kamina": "bura vyakti",
-                "kamine": "bure log",
-                "kutta": "neech vyakti",
-                "kutte": "neech log",
-                "bakwas": "bekaar baat",
-                "gaali": "apmaanjanak shabd",
-                "ganda": "ashubh"
-            },
-            "ta": {
-                # Tamil replacements
-                "முட்டாள்": "அறியாதவர்",
-                "பைத்தியம்": "குழப்பமானவர்",
-                "கழுதை": "மூடனம்றவர்",
-                "நாய்": "தீயவர்",
-                "குத்தி": "தீயவர்",
-                "muttaal": "ariyathavar",
-                "paithiyam": "kuzhhappamanavar",
-                "kazhudhai": "mudanamravar",
-                "naai": "theeyavar",
-                "loosu": "theriyadhavar",
-                "porukki": "kettavar",
-                "kirukku": "pizhhaiyaanavar"
-            },
-            "te": {
-                # Telugu replacements
-                "మూర్ఖుడు": "తెలియని వ్యక్తి",
-                "వెధవ": "అనుభవం లేని వారు",
-                "గాడిదేడు": "మూర్ఖుడు",
-                "గోవు": "మూఢనంమైన వ్యక్తి",
-                "కుక్క": "తప్పుడు వ్యక్తి",
-                "పంది": "మూఢనంమైన వ్యక్తి",
-                "ద్రోహి": "తప్పు మనసు ఉన్న వ్యక్తి",
-                "moorkhhudu": "teliyani vyakthi",
-                "vedava": "anubhavam leni vaaru",
-                "gadidhedu": "moorkhhudu",
-                "govu": "mudanamaina vyakthi",
-                "kukka": "thappudu vyakthi",
-                "pandi": "mudanamaina vyakthi",
-                "drohi": "thappu manasu unna vyakthi",
-                "gadu": "chedda vyakthi"
-            }
-        }
+        Each lowercased word maps to (word, synonym or mask, mask). With
+        Hyperscan installed the matcher is a (database, keys, UTF-8 lengths)
+        triple scanned as in SafetyFilter; with pyahocorasick it is an
+        Aho-Corasick automaton over the lowercased words. Both find every
+        word in one pass. Otherwise the wordlist is compiled as a trie,
+        rendered into a prefix-factored alternation (many words share their
+        first letters) and matched against lowercased text. Optional
+        suffixes are greedy, so "fucking" still wins over "fuck".
+        """
+        synonyms = _SYNONYMS.get(language, {})
+        words: Dict[str, Tuple[str, str, str]] = {}
+        for w in _CUSTOM_WORDS.get(language, ()):
+            key = w.lower()
+            if key not in words:
+                mask = "*" * len(w)
+                words[key] = (w, synonyms.get(key) or synonyms.get(w) or mask, mask)
 
-        if language in self.custom_words:
-            profanity.add_censor_words(self.custom_words[language])
+        matcher: Any = None
+        if words and HYPERSCAN_AVAILABLE:
+            keys = list(words)
+            matcher = (compile_hyperscan(keys), keys, [len(k.encode('utf-8')) for k in keys])
+        elif words and AHOCORASICK_AVAILABLE:
+            matcher = ahocorasick.Automaton()
+            for key in words:
+                matcher.add_word(key, key)
+            matcher.make_automaton()
+        elif words:
+            alternation = compile_alt(build_trie(words))
+            matcher = compile_whole_words(alternation)
+        return MappingProxyType(words), matcher
 
-    def detect_language(self, text: str) -> str:
+    @staticmethod
+    def detect_language(text: str) -> str:
         """
         Simple language detection based on Unicode script ranges.
-        Returns 'en', 'hi', 'ta', or 'te'.
+        Returns 'en', 'hi', 'ta', or 'te'. Needs no instance, so
+        SafetyLayer.detect_language(text) works without building a layer.
         """
-        # Count characters from each script
-        devanagari = sum(1 for c in text if '\u0900' <= c <= '\u097F')  # Hindi
-        tamil = sum(1 for c in text if '\u0B80' <= c <= '\u0BFF')  # Tamil
-        telugu = sum(1 for c in text if '\u0C00' <= c <= '\u0C7F')  # Telugu
-        
-        # Return language with highest character count
-        if devanagari > 0:
-            return 'hi'
-        elif tamil > 0:
-            return 'ta'
-        elif telugu > 0:
-            return 'te'
-        else:
-            return 'en'  # Default to English
+        return detect_script(text)
 
-    def profanity_filter_text(self, text: str, use_synonyms: bool = True) -> ProfanityFilterResult:
+    def profanity_filter_text(self, text: str, use_synonyms: bool = True,
+                              collect_metadata: bool = True) -> ProfanityFilterResult:
+        """
+        Replace (or mask) every listed word in text. With collect_metadata=False
+        profane_words and replacements are left empty and only cleaned_text
+        is built.
+        """
         if not text:
             return ProfanityFilterResult(text, text, [], {}, self.language)
 
-        found: List[str] = []
-        lower = text.lower()
-        for w in self.custom_words.get(self.language, []):
-            if w.lower() in lower:
-                found.append(w)
-
-        cleaned = text
+        lower = fold(text)
+        spans = []
         replacements: Dict[str, str] = {}
-
-        if use_synonyms:
-            for w in found:
-                rep = self._get_replacement(w)
-                cleaned = self._replace_word(cleaned, w, rep)
-                replacements[w] = rep
+        if collect_metadata:
+            for start, end, key in self._scan(lower):
+                w, rep, mask = self._words[key]
+                if w not in replacements:
+                    replacements[w] = rep if use_synonyms else mask
+                spans.append((start, end, w, rep))
+            cleaned = splice(text, spans, replacements)
         else:
-            cleaned = profanity.censor(text)
-            for w in found:
-                replacements[w] = "*" * len(w)
-
-        return ProfanityFilterResult(text, cleaned, list(set(found)), replacements, self.language)
+            slot = 1 if use_synonyms else 2
+            for start, end, key in self._scan(lower):
+                entry = self._words[key]
+                spans.append((start, end, entry[0], entry[slot]))
+            cleaned = splice(text, spans)
+        if not use_synonyms and self.use_better_profanity:
+            # Also mask anything only better-profanity's own wordlist knows about
+            self._ensure_better_profanity()
+            cleaned = profanity.censor(cleaned)
 
-    def _get_replacement(self, word: str) -> str:
-        m = self.synonyms.get(self.language, {})
-        rep = m.get(word.lower()) or m.get(word)  # simple lookup
-        return rep if rep else "*" * len(word)
+        return ProfanityFilterResult(text, cleaned, list(replacements), replacements, self.language)
 
-    def _replace_word(self, text: str, word: str, replacement: str) -> str:
-        import re
+    def profanity_filter_batch(self, texts: List[str], use_synonyms: bool = True,
+                               max_workers: Optional[int] = None) -> List[ProfanityFilterResult]:
+        """
+        Filter many texts with this layer's compiled matcher, in order.
+        Hyperscan releases the GIL while scanning, so with it installed the
+        texts are spread over a thread pool (max_workers defaults to the CPU
+        count); the other matchers hold the GIL and run on the calling thread.
+        """
+        if max_workers is None:
+            max_workers = (os.cpu_count() or 1) if HYPERSCAN_AVAILABLE else 1
+        if max_workers <= 1 or len(texts) < 2:
+            return [self.profanity_filter_text(text, use_synonyms) for text in texts]
 
-        pattern = re.compile(r"\b" + re.escape(word) + r"\b", re.IGNORECASE)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                functools.partial(self.profanity_filter_text, use_synonyms=use_synonyms), texts
+            ))
 
-        def _m(mo):
-            return replacement
+    def _scan(self, lower: str) -> List[Tuple[int, int, str]]:
+        """Whole-word (start, end, key) matches in lowercased text, in order and non-overlapping"""
+        if self._matcher is None:
+            return []
+        if HYPERSCAN_AVAILABLE:
+            database, keys, lengths = self._matcher
+            hits = [(start, end, keys[idx]) for start, end, idx in hyperscan_matches(database, lengths, lower)]
+            return select_spans(lower, hits)
+        if AHOCORASICK_AVAILABLE:
+            hits = [(end - len(key) + 1, end + 1, key) for end, key in self._matcher.iter(lower)]
+            return select_spans(lower, hits)
+        return [(mo.start(), mo.end(), mo.group(1)) for mo in self._matcher.finditer(lower)]
 
-        return pattern.sub(_m, text)
+    def _ensure_better_profanity(self) -> None:
+        if not self._bp_ready:
+            register_better_profanity(self.custom_words.get(self.language, ()))
+            self._bp_ready = True
 
 
 def main():
@@ -241,41 +322,37 @@ def main():
         print(f"Error: Input file '{input_file}' not found!")
         sys.exit(1)
     
-    # Read input text
+    # Create output directory if it doesn't exist
+    output_dir = os.path.dirname(output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+
+    # Auto-detect language once for the whole file; this pass also reads
+    # every chunk, so decoding problems surface before any output is written
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            text = f.read()
+        with open(input_file, 'r', encoding='utf-8') as fin:
+            detected_lang = detect_file_script(fin)
     except Exception as e:
         print(f"Error reading input file: {e}")
         sys.exit(1)
     
-    # Auto-detect language
-    temp_layer = SafetyLayer()
-    detected_lang = temp_layer.detect_language(text)
-    
     # Initialize with detected language
     safety = SafetyLayer(language=detected_lang)
     
-    # Filter text
-    result = safety.profanity_filter_text(text, use_synonyms=True)
-    
-    # Create output directory if it doesn't exist
-    output_dir = os.path.dirname(output_file)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir, exist_ok=True)
-    
-    # Write output - ADD EXPLICIT FLUSH
+    # Stream the file through in chunks rather than reading it whole;
+    # output_file is only replaced once every chunk has been written
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(result.cleaned_text)
-            f.flush()  # Force write to disk
-        # Verify file was written
-        if os.path.exists(output_file):
-            print(f"Done: {output_file}")
+        with open(input_file, 'r', encoding='utf-8') as fin, open_atomic(output_file) as fout:
+            for piece in read_chunks(fin):
+                fout.write(safety.profanity_filter_text(
+                    piece, use_synonyms=True, collect_metadata=False
+                ).cleaned_text)
     except Exception as e:
         print(f"Error writing output file: {e}")
         sys.exit(1)
 
+    print(f"Done: {output_file}")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Regression tests for safety_filter.
+
+Each matching test runs against every backend installed here (Hyperscan,
+pyahocorasick, and the regex fallback, which is always available).
+
+Usage:
+    python -m unittest test_safety_filter
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import safety_common
+import safety_filter
+from safety_common import detect_file_script, detect_script, read_chunks
+from safety_filter import SafetyFilter
+
+
+def backend_patches(module):
+    """
+    (name, patcher) for each backend that can run here. Each patcher sets
+    module's availability flags so it falls through to that backend.
+    """
+    backends = []
+    if safety_common.HYPERSCAN_AVAILABLE:
+        backends.append(('hyperscan', {'HYPERSCAN_AVAILABLE': True}))
+    if safety_common.AHOCORASICK_AVAILABLE:
+        backends.append(('ahocorasick', {'HYPERSCAN_AVAILABLE': False}))
+    backends.append(('regex', {'HYPERSCAN_AVAILABLE': False, 'AHOCORASICK_AVAILABLE': False}))
+    return [(name, mock.patch.multiple(module, **flags)) for name, flags in backends]
+
+
+class TestMatching(unittest.TestCase):
+    def check(self, language, text, expected):
+        for name, patcher in backend_patches(safety_filter):
+            with self.subTest(backend=name), patcher:
+                result = SafetyFilter(language).filter_detailed(text)
+                self.assertEqual(result.cleaned_text, expected)
+
+    def test_case_folding(self):
+        self.check('en', 'You IDIOT', 'You inexperienced person')
+
+    def test_lowercase_grows_in_utf8(self):
+        # U+212A KELVIN SIGN lowercases to ASCII 'k'
+        self.check('en', 'you jerK', 'you rude person')
+
+    def test_non_ascii_lookalike_is_not_a_match(self):
+        # U+017F LATIN SMALL LETTER LONG S is not 's' once folded
+        self.check('en', 'ſtupid idiot', 'ſtupid inexperienced person')
+
+    def test_word_ending_in_combining_mark(self):
+        # बेवकूफ़ ends in a nukta, a combining mark
+        self.check('hi', 'तुम बेवकूफ़ हो', 'तुम अनजान हो')
+
+    def test_word_ending_in_virama(self):
+        self.check('ta', 'நீ முட்டாள்', 'நீ அறியாதவர்')
+        self.check('ta', 'நீ முட்டாள்!', 'நீ அறியாதவர்!')
+
+    def test_inflected_form_is_not_a_match(self):
+        # लंड is listed; the trailing vowel sign makes लंडे a different word
+        self.check('hi', 'लंडे', 'लंडे')
+        self.check('hi', 'तुम लंडे हो', 'तुम लंडे हो')
+
+    def test_lone_surrogate(self):
+        self.check('en', 'idiot \ud800 idiot', 'inexperienced person \ud800 inexperienced person')
+
+
+class TestResultCache(unittest.TestCase):
+    def test_key_follows_settings(self):
+        f = SafetyFilter('en')
+        text = 'तुम बेवकूफ़ हो'
+        self.assertEqual(f.filter(text), text)
+        self.assertEqual(f.filter(text, use_synonyms=False), text)
+        f.auto_detect = True
+        self.assertEqual(f.filter(text), 'तुम अनजान हो')
+        self.assertEqual(f.filter(text, use_synonyms=False), 'तुम ******* हो')
+
+    @unittest.skipUnless(safety_common.BETTER_PROFANITY_AVAILABLE, 'needs better-profanity')
+    def test_key_follows_better_profanity(self):
+        f = SafetyFilter('en')
+        self.assertEqual(f.filter('you boobs', use_synonyms=False), 'you boobs')
+        f.use_better_profanity = True
+        self.assertEqual(f.filter('you boobs', use_synonyms=False), 'you ****')
+
+
+class TestDetectScript(unittest.TestCase):
+    def test_lone_surrogate(self):
+        # Long enough for the NumPy path when NumPy is installed
+        text = '\ud800' + 'x' * 100 + 'த'
+        self.assertEqual(detect_script(text), 'ta')
+
+
+class TestCommandLine(unittest.TestCase):
+    def test_read_chunks_keeps_small_files_whole(self):
+        text = 'first line\nsecond line without a newline'
+        self.assertEqual(list(read_chunks(io.StringIO(text))), [text])
+
+    def test_read_chunks_cuts_only_after_line_breaks(self):
+        text = ''.join('bloody fool %d\n' % i for i in range(100)) + 'bloody fool'
+        with mock.patch.object(safety_common, 'CLI_CHUNK_SIZE', 40):
+            pieces = list(read_chunks(io.StringIO(text)))
+        self.assertGreater(len(pieces), 1)
+        self.assertEqual(''.join(pieces), text)
+        self.assertTrue(all(piece.endswith('\n') for piece in pieces[:-1]))
+
+    def test_detect_file_script_reads_past_first_chunk(self):
+        text = 'hello there\n' * 20 + 'முட்டாள்'
+        with mock.patch.object(safety_common, 'CLI_CHUNK_SIZE', 16):
+            self.assertEqual(detect_file_script(io.StringIO(text)), 'ta')
+
+    def run_main(self, text, existing=None):
+        """Run main() on text; returns (exit code or None, output file contents)"""
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = os.path.join(tmp, 'in.txt')
+            output_file = os.path.join(tmp, 'out.txt')
+            with open(input_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+            if existing is not None:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    f.write(existing)
+            code = None
+            with mock.patch.object(sys, 'argv', ['safety_filter.py', input_file, output_file]), \
+                    mock.patch('builtins.print'):
+                try:
+                    safety_filter.main()
+                except SystemExit as e:
+                    code = e.code
+            # No temporary output is left behind
+            self.assertEqual(sorted(os.listdir(tmp)), ['in.txt', 'out.txt'])
+            with open(output_file, encoding='utf-8') as f:
+                return code, f.read()
+
+    def test_main_detects_language_once_per_file(self):
+        code, output = self.run_main('नमस्ते दोस्त\ntum chutiya ho')
+        self.assertIsNone(code)
+        self.assertEqual(output, 'नमस्ते दोस्त\ntum moorkhh ho')
+
+    def test_failed_write_leaves_output_alone(self):
+        with mock.patch.object(SafetyFilter, 'filter', side_effect=OSError('disk full')):
+            code, output = self.run_main('idiot', existing='previous')
+        self.assertEqual(code, 1)
+        self.assertEqual(output, 'previous')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Regression tests for safety_layer_text. Matching shared with safety_filter
+is covered in test_safety_filter; these cover what SafetyLayer adds.
+
+Usage:
+    python -m unittest test_safety_layer_text
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import safety_layer_text
+from safety_layer_text import SafetyLayer
+from test_safety_filter import backend_patches
+
+
+class TestMatching(unittest.TestCase):
+    def tearDown(self):
+        SafetyLayer._compile_language.cache_clear()
+
+    def check(self, language, text, expected, use_synonyms=True):
+        for name, patcher in backend_patches(safety_layer_text):
+            with self.subTest(backend=name), patcher:
+                # Matchers are cached per language; rebuild them for this backend
+                SafetyLayer._compile_language.cache_clear()
+                result = SafetyLayer(language).profanity_filter_text(text, use_synonyms)
+                self.assertEqual(result.cleaned_text, expected)
+
+    def test_masking(self):
+        self.check('hi', 'tum chutiya ho', 'tum ******* ho', use_synonyms=False)
+
+    def test_batch_keeps_order(self):
+        layer = SafetyLayer('en')
+        texts = ['idiot %d' % i for i in range(20)]
+        results = layer.profanity_filter_batch(texts, max_workers=4)
+        self.assertEqual([r.original_text for r in results], texts)
+
+
+class TestCommandLine(unittest.TestCase):
+    def run_main(self, text, existing=None):
+        """Run main() on text; returns (exit code or None, output file contents)"""
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = os.path.join(tmp, 'in.txt')
+            output_file = os.path.join(tmp, 'out.txt')
+            with open(input_file, 'wb') as f:
+                f.write(text)
+            if existing is not None:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    f.write(existing)
+            code = None
+            with mock.patch.object(sys, 'argv', ['safety_layer_text.py', input_file, output_file]), \
+                    mock.patch('builtins.print'):
+                try:
+                    safety_layer_text.main()
+                except SystemExit as e:
+                    code = e.code
+            # No temporary output is left behind
+            self.assertEqual(sorted(os.listdir(tmp)), ['in.txt', 'out.txt'])
+            with open(output_file, encoding='utf-8') as f:
+                return code, f.read()
+
+    def test_detects_language_once_per_file(self):
+        code, output = self.run_main('नमस्ते दोस्त\ntum chutiya ho'.encode('utf-8'))
+        self.assertIsNone(code)
+        self.assertEqual(output, 'नमस्ते दोस्त\ntum ******* ho')
+
+    def test_undecodable_input_leaves_output_alone(self):
+        code, output = self.run_main(b'idiot\n\xff bad', existing='previous')
+        self.assertEqual(code, 1)
+        self.assertEqual(output, 'previous')
+
+    def test_failed_write_leaves_output_alone(self):
+        with mock.patch.object(SafetyLayer, 'profanity_filter_text', side_effect=OSError('disk full')):
+            code, output = self.run_main(b'idiot', existing='previous')
+        self.assertEqual(code, 1)
+        self.assertEqual(output, 'previous')
+
+
+if __name__ == '__main__':
+    unittest.main()